@@ -10,18 +10,21 @@ Defaults:
   save sequences: True -> directory `sequences/`
   save alignments: True -> directory `result-alignments/`
 
-Assumes helper scripts (`repeatsdb_scrape.py`, `sequences_scrape.py`) are in `scripts/` by default; falls back
-to project root if not present.
+Assumes helper scripts (`repeatsdb_scrape.py`, `sequences_scrape.py`) are in `scripts/` by default. They are
+imported and their `main(argv)` entry points called in-process rather than spawned as subprocesses.
+With one worker, a single Chrome is started and reused for every region's scrape.
 """
 
 import argparse
+import atexit
+import importlib
 import os
-import subprocess
 import sys
-import concurrent.futures
+import traceback
 import multiprocessing
+import multiprocessing.pool
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 
 DEFAULT_REGIONS = [
     "3.1", "3.2", "3.3", "3.4",
@@ -30,55 +33,155 @@ DEFAULT_REGIONS = [
 ]
 
 
+# process pool reused across main() calls (e.g. when driven from a notebook)
+_POOL: Optional[multiprocessing.pool.Pool] = None
+_POOL_WORKERS = 0
+
+
+def _shutdown_pool() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.close()
+        _POOL.join()
+        _POOL = None
+
+
+def _get_pool(workers: int) -> multiprocessing.pool.Pool:
+    """Return the module-level spawn pool, (re)creating it if the worker count changed."""
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        _shutdown_pool()
+        _POOL = multiprocessing.get_context('spawn').Pool(workers)
+        _POOL_WORKERS = workers
+    return _POOL
+
+
+atexit.register(_shutdown_pool)
+
+
 # helper to normalize region string for filenames (3.1 -> 3_1)
 def region_fname(region: str) -> str:
     return region.replace('.', '_')
 
 
-def run_region(region: str,
-               annotations_dir: str,
-               alignments_dir: str,
-               sequences_dir: str,
-               scripts_dir: str,
-               save_alignments: bool,
-               save_sequences: bool,
-               python_executable: str,
-               alignments_only: bool = False) -> int:
-    """Run repeatsdb_scrape for `region`, then run sequences_scrape on its CSV.
-    Returns 0 on success for both steps, non-zero if repeatsdb_scrape fails.
-    """
+def region_paths(region: str, annotations_dir: str, alignments_dir: str,
+                 sequences_dir: str) -> Tuple[str, str, str]:
+    """Return (annotation_csv, alignment_outdir, sequences_out) for `region`."""
     region_id = region_fname(region)
-
-    # paths per-region
     annotation_csv = os.path.join(annotations_dir, f"repeatsDB_annotations_{region_id}.csv")
     alignment_outdir = os.path.join(alignments_dir, f"repeatsDB_alignments_{region_id}")
     sequences_out = os.path.join(sequences_dir, f"repeatsDB_seqs_{region_id}.fasta")
+    return annotation_csv, alignment_outdir, sequences_out
+
+
+def script_module(scripts_dir: str, module_name: str):
+    """Import `module_name` from `scripts_dir`."""
+    scripts_dir = os.path.abspath(scripts_dir)
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    return importlib.import_module(module_name)
+
 
-    os.makedirs(os.path.dirname(annotation_csv) or '.', exist_ok=True)
-    os.makedirs(alignment_outdir, exist_ok=True)
+def script_main(scripts_dir: str, module_name: str):
+    """Import `module_name` from `scripts_dir` and return its `main(argv)` entry point."""
+    return script_module(scripts_dir, module_name).main
 
-    python = python_executable or 'python'
 
-    # build repeatsdb_scrape command
+def call_main(main_fn, argv: List[str], label: str = "", **kwargs) -> int:
+    """Call a script's `main(argv, **kwargs)` and return its exit code.
+
+    SystemExit is turned into its code; any other exception is printed with its
+    traceback (prefixed by `label`) and reported as exit code 1, so one failing
+    region does not stop the remaining ones, as with the former subprocess calls.
+    """
+    try:
+        main_fn(argv, **kwargs)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        print(f"{label or main_fn.__module__} raised an exception:")
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def scrape_region(region: str,
+                  annotations_dir: str,
+                  alignments_dir: str,
+                  sequences_dir: str,
+                  scripts_dir: str,
+                  save_alignments: bool,
+                  alignments_only: bool = False,
+                  download_workers: int = 32,
+                  driver=None) -> int:
+    """Run repeatsdb_scrape for `region`; returns its exit code.
+
+    `driver` is an already running Chrome (see start_shared_driver()) to scrape with
+    instead of starting a new browser for this region.
+    """
+    annotation_csv, alignment_outdir, _ = region_paths(
+        region, annotations_dir, alignments_dir, sequences_dir)
+
+    # build repeatsdb_scrape arguments
     if alignments_only:
-        scrape_cmd = [python, os.path.join(scripts_dir, 'repeatsdb_scrape.py'),
-                      '--output-dir', alignment_outdir,
-                      '--output-csv', annotation_csv,
-                      '--fetch-alignments-only']
+        scrape_args = ['--output-dir', alignment_outdir,
+                       '--output-csv', annotation_csv,
+                       '--fetch-alignments-only']
     else:
-        scrape_cmd = [python, os.path.join(scripts_dir, 'repeatsdb_scrape.py'),
-                      '--region-classes', region,
-                      '--output-dir', alignment_outdir,
-                      '--output-csv', annotation_csv]
+        scrape_args = ['--region-classes', region,
+                       '--output-dir', alignment_outdir,
+                       '--output-csv', annotation_csv]
 
         if not save_alignments:
-            scrape_cmd.append('--skip-alignments')
+            scrape_args.append('--skip-alignments')
+    scrape_args += ['--download-workers', str(download_workers)]
 
     print(f"Running repeatsdb_scrape for region {region} -> {annotation_csv}")
-    r = subprocess.run(scrape_cmd)
-    if r.returncode != 0:
-        print(f"repeatsdb_scrape failed for region {region} with exit {r.returncode}")
-        return r.returncode
+    extra = {'driver': driver} if driver is not None else {}
+    rc = call_main(script_main(scripts_dir, 'repeatsdb_scrape'), scrape_args,
+                   label=f"repeatsdb_scrape for region {region}", **extra)
+    if rc != 0:
+        print(f"repeatsdb_scrape failed for region {region} with exit {rc}")
+    return rc
+
+
+def run_sequences(region: str,
+                  annotations_dir: str,
+                  alignments_dir: str,
+                  sequences_dir: str,
+                  scripts_dir: str) -> int:
+    """Run sequences_scrape on the annotation CSV of `region`; returns its exit code."""
+    annotation_csv, _, sequences_out = region_paths(
+        region, annotations_dir, alignments_dir, sequences_dir)
+    print(f"Running sequences_scrape for region {region} -> {sequences_out}")
+    rc = call_main(script_main(scripts_dir, 'sequences_scrape'), [annotation_csv, sequences_out],
+                   label=f"sequences_scrape for region {region}")
+    if rc != 0:
+        print(f"sequences_scrape failed for region {region} with exit {rc}")
+    return rc
+
+
+def run_region(region: str,
+               annotations_dir: str,
+               alignments_dir: str,
+               sequences_dir: str,
+               scripts_dir: str,
+               save_alignments: bool,
+               save_sequences: bool,
+               alignments_only: bool = False,
+               download_workers: int = 32,
+               driver=None) -> int:
+    """Run repeatsdb_scrape for `region`, then run sequences_scrape on its CSV.
+    Returns 0 on success for both steps, non-zero if repeatsdb_scrape fails.
+    Output directories are expected to exist already (main() creates them).
+    """
+    rc = scrape_region(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
+                       save_alignments, alignments_only=alignments_only,
+                       download_workers=download_workers, driver=driver)
+    if rc != 0:
+        return rc
 
     # If alignments-only mode was requested, skip sequence extraction
     if alignments_only:
@@ -86,19 +189,54 @@ def run_region(region: str,
         return 0
 
     if save_sequences:
-        # run sequences_scrape on the produced CSV
-        seq_cmd = [python, os.path.join(scripts_dir, 'sequences_scrape.py'), annotation_csv, sequences_out]
-        print(f"Running sequences_scrape for region {region} -> {sequences_out}")
-        s = subprocess.run(seq_cmd)
-        if s.returncode != 0:
-            print(f"sequences_scrape failed for region {region} with exit {s.returncode}")
-            # do not treat as fatal for other regions
+        # a sequences_scrape failure is not fatal for other regions
+        run_sequences(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir)
     else:
         print(f"Skipping sequences_scrape for region {region} (--no-sequences)")
 
     return 0
 
 
+def start_shared_driver(scripts_dir: str):
+    """Start one Chrome for the serial path to reuse across regions, or None if it fails.
+
+    On failure each region falls back to starting (and reporting on) its own browser.
+    """
+    try:
+        return script_module(scripts_dir, 'repeatsdb_scrape').make_chrome_driver()
+    except Exception as e:
+        print(f"Could not start a shared Chrome driver: {e}")
+        return None
+
+
+def quit_shared_driver(driver) -> None:
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def run_region_wrapped(region: str, *args) -> Tuple[int, Optional[str]]:
+    """run_region() for pool workers: returns (exit_code, error) instead of raising."""
+    try:
+        return run_region(region, *args), None
+    except Exception as e:
+        return 1, str(e)
+
+
+def _run_region_star(args: tuple) -> Tuple[str, Tuple[int, Optional[str]]]:
+    """Pool task: unpack (region, *run_region args) and tag the result with its region."""
+    return args[0], run_region_wrapped(*args)
+
+
+def _wait_sequences(region: str, result: multiprocessing.pool.AsyncResult) -> None:
+    try:
+        result.get()
+    except Exception as e:
+        print(f"sequences_scrape for region {region} raised exception: {e}")
+
+
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Run RepeatDB pipeline: scrape + extract sequences")
     parser.add_argument("--regions", nargs="*", default=DEFAULT_REGIONS,
@@ -112,6 +250,9 @@ def main(argv=None):
     parser.add_argument("--annotations-dir", type=str, default="result-annotations", help="Directory to write/read annotation CSVs")
     parser.add_argument("--scripts-dir", type=str, default="scripts", help="Directory containing helper scripts")
     parser.add_argument("--workers", type=int, default=1, help="Number of regions to process in parallel (default: 1)")
+    parser.add_argument("--download-workers", type=int, default=32,
+                        help="Concurrent alignment downloads within each region: thread-pool size, "
+                             "or the in-flight request limit with aiohttp (default: 32)")
 
     args = parser.parse_args(argv)
 
@@ -123,37 +264,73 @@ def main(argv=None):
     alignments_dir = args.alignments_dir
     annotations_dir = args.annotations_dir
     scripts_dir = args.scripts_dir
+    download_workers = args.download_workers
 
-    os.makedirs(sequences_dir, exist_ok=True)
-    os.makedirs(alignments_dir, exist_ok=True)
-    os.makedirs(annotations_dir, exist_ok=True)
+    # create every output directory up front so region workers skip the syscalls
+    out_dirs = {sequences_dir, alignments_dir, annotations_dir}
+    for region in regions:
+        annotation_csv, alignment_outdir, _ = region_paths(
+            region, annotations_dir, alignments_dir, sequences_dir)
+        out_dirs.add(os.path.dirname(annotation_csv) or '.')
+        out_dirs.add(alignment_outdir)
+    for d in out_dirs:
+        os.makedirs(d, exist_ok=True)
 
     # concurrency setup
     workers = max(1, min(args.workers, len(regions))) if hasattr(args, 'workers') else 1
 
     print(f"Processing {len(regions)} regions with {workers} worker(s)")
 
-    python_exec = sys.executable or 'python'
-
-    if workers == 1:
-        for region in regions:
-            run_region(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
-                       save_alignments, save_sequences, python_exec, alignments_only=alignments_only)
+    if workers == 1 and save_sequences and not alignments_only:
+        # double-buffer: extract sequences for region i-1 in a background process
+        # while region i is being scraped
+        seq_pool = _get_pool(1)
+        pending = None
+        driver = None  # one browser for every region, restarted after a failed scrape
+        try:
+            for region in regions:
+                driver = driver or start_shared_driver(scripts_dir)
+                rc = scrape_region(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
+                                   save_alignments, download_workers=download_workers, driver=driver)
+                if rc != 0:
+                    quit_shared_driver(driver)
+                    driver = None
+                if pending is not None:
+                    _wait_sequences(*pending)
+                    pending = None
+                if rc == 0:
+                    result = seq_pool.apply_async(run_sequences, (region, annotations_dir, alignments_dir,
+                                                                  sequences_dir, scripts_dir))
+                    pending = (region, result)
+            if pending is not None:
+                _wait_sequences(*pending)
+        finally:
+            quit_shared_driver(driver)
+    elif workers == 1:
+        driver = None  # alignments-only runs never start a browser
+        try:
+            for region in regions:
+                if not alignments_only:
+                    driver = driver or start_shared_driver(scripts_dir)
+                rc = run_region(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
+                                save_alignments, save_sequences, alignments_only=alignments_only,
+                                download_workers=download_workers, driver=driver)
+                if rc != 0:
+                    quit_shared_driver(driver)
+                    driver = None
+        finally:
+            quit_shared_driver(driver)
     else:
-        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as exe:
-            futures = {
-                exe.submit(run_region, region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
-                           save_alignments, save_sequences, python_exec, alignments_only): region
-                for region in regions
-            }
-            for fut in concurrent.futures.as_completed(futures):
-                region = futures[fut]
-                try:
-                    code = fut.result()
-                    if code != 0:
-                        print(f"Region {region} finished with non-zero code {code}")
-                except Exception as e:
-                    print(f"Region {region} raised exception: {e}")
+        pool = _get_pool(workers)
+        tasks = [(region, annotations_dir, alignments_dir, sequences_dir, scripts_dir,
+                  save_alignments, save_sequences, alignments_only, download_workers)
+                 for region in regions]
+        # one region per task: regions are few, long and uneven, so hand them out as workers free up
+        for region, (code, error) in pool.imap_unordered(_run_region_star, tasks, chunksize=1):
+            if error is not None:
+                print(f"Region {region} raised exception: {error}")
+            elif code != 0:
+                print(f"Region {region} finished with non-zero code {code}")
 
 
 if __name__ == "__main__":
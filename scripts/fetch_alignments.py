@@ -2,75 +2,426 @@
 """
 Lightweight alignment fetcher for RepeatsDB.
 Reads an annotations CSV and downloads alignment FASTAs via the RepeatsDB API.
-No selenium/beautifulsoup dependencies — only uses requests.
+No selenium/beautifulsoup dependencies — only uses requests (plus aiohttp, used
+by default when installed unless --no-async is given, and pandas for faster CSV
+parsing when installed).
 """
 
 import os
 import sys
 import csv
 import ast
+import io
+import json
+import logging
+import pickle
+import queue
+import re
+import tempfile
 import time
 import argparse
-import requests
+import asyncio
+import importlib.util
+import threading
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, suppress
 import tqdm
+from http_session import RETRY_STATUSES, lazy_session
 
+try:
+    import pandas as pd
+except ImportError:  # optional: load_annotations falls back to csv.DictReader
+    pd = None
 
-def fetch_alignment(pdb_id, chain, source, region_num, region_id,
-                    output_dir="repeatsDB_alignments", error_log=None, silent=False):
-    """Download alignment FASTA for a specific region."""
+# Shared HTTP session so keep-alive connections to repeatsdb.org are reused
+# across downloads.
+get_session = lazy_session(retries=5, backoff_factor=0.2,
+                           pool_connections=32, pool_maxsize=64,
+                           allowed_methods=("GET", "HEAD"), schemes=("https://",),
+                           headers={"Accept": "text/plain", "Accept-Encoding": "gzip"})
+# Probes check existence with HEAD. A HEAD answered with one of these statuses,
+# or any other 4xx except 404 (APIs often send 400/403 for HEAD on GET-only
+# routes), is retried as a GET; once such a GET succeeds, _HEAD_UNSUPPORTED
+# is set and later probes go straight to GET.
+HEAD_UNSUPPORTED_STATUSES = (405, 501)
+_HEAD_UNSUPPORTED = False
+
+
+def _head_refused(status):
+    """True if a HEAD answered with `status` should be retried as a GET."""
+    return (status in HEAD_UNSUPPORTED_STATUSES
+            or (400 <= status < 500 and status != 404 and status not in RETRY_STATUSES))
+# Download errors go through this logger; main() attaches a queue-backed
+# file handler so worker threads never block on the log file.
+_ERROR_LOGGER = logging.getLogger("repeatsdb.errors")
+# Number of consecutive region_num values probed concurrently per region.
+PROBE_WINDOW = 8
+# Once an earlier region of the row was found, stop probing after this many
+# consecutive 404s instead of walking the full max_retries range.
+MAX_CONSECUTIVE_MISSES = 3
+# Probe requests run on their own pool so row workers can block on them
+# without starving each other.
+_PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=64)
+_ADB_URL_TEMPLATE = ("https://repeatsdb.org/api/public/production/adb/"
+                     "{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta")
+# db_id is the middle two characters of the PDB id ('a1' for '1a17')
+_PDB_URL_TEMPLATE = ("https://repeatsdb.org/api/public/production/pdb/{db_id}/"
+                     "{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta")
+_OUTPUT_NAME_TEMPLATE = "{pdb_id}_{chain}_{region_id}_{region_num}.fasta"
+# (output_dir, region_id) -> region subdirectory already created on disk.
+# Only valid for one download run; reset by _reset_run_caches().
+_REGION_DIR_CACHE = {}
+# region subdirectory -> file names it held when first resolved, so reruns can
+# skip finished alignments without a stat() per candidate region_num.
+# Only valid for one download run; reset by _reset_run_caches().
+_REGION_DIR_LISTING = {}
+# (output_dir, pdb_id, chain, source, region_id, start_region_num) -> Future
+# (or asyncio Task) of that region's probe, so duplicate rows in a run wait for
+# one probe and download instead of repeating it. Reset by _reset_run_caches().
+_RUN_PROBES = {}
+_RUN_PROBES_LOCK = threading.Lock()
+# Unit number in alignment headers such as '>unit.5.fasta'.
+_UNIT_RE = re.compile(rb"^>unit\.(\d+)\b", re.M)
+# Alignment files are written by a background thread so disk I/O stays off
+# the request path; the bounded queue provides backpressure.
+_WRITE_QUEUE = queue.Queue(maxsize=1024)
+_WRITER_THREAD = None
+_WRITER_LOCK = threading.Lock()
+
+
+@contextmanager
+def _atomic_output(output_path):
+    """Open a unique ".part" file next to `output_path` for writing.
+
+    The file is renamed over `output_path` once the block completes and removed
+    if it fails, so the final path only ever holds a complete file and
+    concurrent writers never share a temporary file.
+    """
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(output_path),
+                                    prefix=os.path.basename(output_path) + ".",
+                                    suffix=".part", delete=False)
+    try:
+        with f:
+            yield f
+        os.replace(f.name, output_path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(f.name)
+        raise
+
+
+def _write_atomic(output_path, content):
+    """Write `content` to `output_path` through _atomic_output()."""
+    with _atomic_output(output_path) as f:
+        f.write(content)
+
+
+def _writer_loop():
+    while True:
+        output_path, content = _WRITE_QUEUE.get()
+        try:
+            _write_atomic(output_path, content)
+        except OSError as e:
+            print(f"Error writing {output_path}: {e}", file=sys.stderr)
+        finally:
+            _WRITE_QUEUE.task_done()
+
+
+def write_alignment(output_path, content):
+    """Queue `content` to be written to `output_path` by the background writer."""
+    global _WRITER_THREAD
+    with _WRITER_LOCK:
+        if _WRITER_THREAD is None:
+            _WRITER_THREAD = threading.Thread(target=_writer_loop, daemon=True)
+            _WRITER_THREAD.start()
+    _WRITE_QUEUE.put((output_path, content))
+
+
+def flush_writes():
+    """Block until every queued alignment file has been written."""
+    _WRITE_QUEUE.join()
+
+
+def alignment_url(pdb_id, chain, source, region_num):
+    """Return the RepeatsDB API URL of one region's alignment FASTA."""
     if source == "AlphaFoldDB":
-        db_id = "adb"
-        url = (f"https://repeatsdb.org/api/public/production/{db_id}/"
-               f"{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta")
-    else:
-        db_id = pdb_id[1:3]
-        url = (f"https://repeatsdb.org/api/public/production/pdb/{db_id}/"
-               f"{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta")
+        return _ADB_URL_TEMPLATE.format(pdb_id=pdb_id, chain=chain, region_num=region_num)
+    return _PDB_URL_TEMPLATE.format(db_id=pdb_id[1:3], pdb_id=pdb_id, chain=chain,
+                                    region_num=region_num)
 
-    region_dir_name = f"repeatsDB_alignments_{region_id.replace('.', '_')}"
-    region_output_dir = os.path.join(output_dir, region_dir_name)
-    os.makedirs(region_output_dir, exist_ok=True)
 
-    output_path = os.path.join(
-        region_output_dir, f"{pdb_id}_{chain}_{region_id}_{region_num}.fasta"
-    )
+def _region_output_dir(output_dir, region_id):
+    """Return (and create once) the per-region subdirectory of `output_dir`."""
+    key = (output_dir, region_id)
+    region_output_dir = _REGION_DIR_CACHE.get(key)
+    if region_output_dir is None:
+        region_dir_name = f"repeatsDB_alignments_{region_id.replace('.', '_')}"
+        region_output_dir = os.path.join(output_dir, region_dir_name)
+        os.makedirs(region_output_dir, exist_ok=True)
+        _REGION_DIR_LISTING[region_output_dir] = frozenset(os.listdir(region_output_dir))
+        _REGION_DIR_CACHE[key] = region_output_dir
+    return region_output_dir
+
+
+def _reset_run_caches():
+    """Forget state resolved by an earlier download run in this process.
+
+    Scripts are run in-process (run_pipeline calls main() repeatedly), so a
+    directory created, listed or removed by a previous run must be looked at
+    again rather than trusted from the module-level caches.
+    """
+    _REGION_DIR_CACHE.clear()
+    _REGION_DIR_LISTING.clear()
+    with _RUN_PROBES_LOCK:
+        _RUN_PROBES.clear()
+
+
+def alignment_output_path(output_dir, pdb_id, chain, region_id, region_num):
+    """Return the local FASTA path for a region, creating its region directory."""
+    region_output_dir = _region_output_dir(output_dir, region_id)
+    return os.path.join(region_output_dir, _OUTPUT_NAME_TEMPLATE.format(
+        pdb_id=pdb_id, chain=chain, region_id=region_id, region_num=region_num))
+
+
+def _fetch_bytes(url):
+    """GET `url` and return the response body, or None if it does not exist (404).
+
+    Transient failures (429/5xx, connection errors) are retried by the session's
+    adapter; anything still failing afterwards is raised to the caller.
+    Duplicate rows are deduplicated per run by _probe_region_once(), not here.
+    """
+    r = get_session().get(url, timeout=30)
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.content
+
+
+def _try_fetch_bytes(url):
+    """Like _fetch_bytes(), but return the exception instead of raising it."""
     try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        content = r.content
-        with open(output_path, "wb") as f:
-            f.write(content)
-        return content.decode("utf-8", errors="ignore")
+        return _fetch_bytes(url)
+    except Exception as e:
+        return e
+
+
+def _probe_exists(url):
+    """HEAD `url`: True if it exists, None on 404, or the exception on other failures.
+
+    Only existence decides a probe, so misses and speculative hits above the
+    winner transfer no body. A HEAD the server refuses (see _head_refused())
+    is retried as a GET, in which case the body (or None) is returned as from
+    _try_fetch_bytes(); a HEAD-only error never fails the probe.
+    """
+    global _HEAD_UNSUPPORTED
+    if _HEAD_UNSUPPORTED:
+        return _try_fetch_bytes(url)
+    try:
+        r = get_session().head(url, timeout=10, allow_redirects=True)
+        if r.status_code == 404:
+            return None
+        if not _head_refused(r.status_code):
+            r.raise_for_status()
+            return True
     except Exception as e:
-        if not silent:
-            error_msg = (f"Error fetching {pdb_id} {chain} region {region_id} "
-                         f"(region_num={region_num}) from {url}: {e}\n")
-            if error_log:
-                error_log.write(error_msg)
-                error_log.flush()
+        return e
+    result = _try_fetch_bytes(url)
+    if not isinstance(result, Exception):
+        # GET works where HEAD did not: skip HEAD from now on
+        _HEAD_UNSUPPORTED = True
+    return result
+
+
+def _stream_to_file(url, output_path):
+    """Stream `url` into `output_path`, teeing the chunks into the returned bytes.
+
+    Returns None on a 404 (nothing is written) and raises on other errors.
+    iter_content() is used rather than copying r.raw so gzip responses are
+    decoded before they reach disk. The chunks go through _atomic_output(), so
+    an interrupted download never appears under its final name.
+    """
+    with get_session().get(url, stream=True, timeout=30) as r:
+        if r.status_code == 404:
+            r.content  # drain the short body so the connection returns to the pool
+            return None
+        r.raise_for_status()
+        buf = io.BytesIO()
+        with _atomic_output(output_path) as f:
+            for chunk in r.iter_content(chunk_size=65536):
+                f.write(chunk)
+                buf.write(chunk)
+        return buf.getvalue()
+
+
+def _existing_alignment(output_dir, pdb_id, chain, region_id, region_nums):
+    """Return (region_num, content) for an alignment already saved by an earlier run.
+
+    Only the winning region_num of a probe is ever written, so the lowest
+    non-empty file in `region_nums` is the one a fresh probe would find.
+    Writers go through _atomic_output(), so an interrupted download never
+    shows up here under its final name.
+    """
+    region_output_dir = _region_output_dir(output_dir, region_id)
+    existing = _REGION_DIR_LISTING.get(region_output_dir, ())
+    for num in region_nums:
+        name = _OUTPUT_NAME_TEMPLATE.format(
+            pdb_id=pdb_id, chain=chain, region_id=region_id, region_num=num)
+        if name not in existing:
+            continue
+        with open(os.path.join(region_output_dir, name), "rb") as f:
+            content = f.read()
+        if content:
+            return num, content
+    return None, None
+
+
+def _first_decided(region_nums, results):
+    """Return the lowest region_num whose probe found data or failed outright.
+
+    Returns None while a lower probe is still pending or if every probe was a 404.
+    """
+    for num in region_nums:
+        if num not in results:
+            return None
+        if results[num]:
+            return num
+    return None
+
+
+def _leading_misses(region_nums, results):
+    """Count consecutive region_nums, from the first, whose probe found nothing."""
+    misses = 0
+    for num in region_nums:
+        if num not in results or results[num]:
+            break
+        misses += 1
+    return misses
+
+
+def probe_region(pdb_id, chain, source, region_id, start_region_num,
+                 output_dir, max_retries=30, window=PROBE_WINDOW):
+    """Find and save the first alignment at region_num >= start_region_num.
+
+    Probes `window` consecutive region numbers concurrently and keeps the lowest
+    one that succeeds, sliding the window past 404s until `max_retries` numbers
+    have been tried. Returns (region_num, fasta_content), or (None, None) if none
+    exist. A non-404 failure at the deciding region_num is raised rather than
+    skipped, so a transient error never slides the window past valid data.
+    Alignments already on disk from a previous run are reused without a request.
+
+    When start_region_num > 0 (an earlier region of the row was found), probing
+    stops after MAX_CONSECUTIVE_MISSES consecutive 404s.
+    """
+    end = start_region_num + max_retries
+    early_exit = start_region_num > 0
+    found_num, content = _existing_alignment(
+        output_dir, pdb_id, chain, region_id, range(start_region_num, end))
+    if found_num is not None:
+        return found_num, content
+
+    for base in range(start_region_num, end, window):
+        region_nums = list(range(base, min(base + window, end)))
+        futures = {
+            _PROBE_EXECUTOR.submit(
+                _probe_exists, alignment_url(pdb_id, chain, source, num)
+            ): num
+            for num in region_nums
+        }
+        results = {}
+        winner = None
+        exhausted = False
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+            if early_exit and _leading_misses(region_nums, results) >= MAX_CONSECUTIVE_MISSES:
+                exhausted = True
+                break
+            winner = _first_decided(region_nums, results)
+            if winner is not None:
+                break
+        for fut in futures:
+            fut.cancel()
+        if exhausted:
+            return None, None
+
+        if winner is not None:
+            content = results[winner]
+            if isinstance(content, Exception):
+                raise content
+            output_path = alignment_output_path(output_dir, pdb_id, chain, region_id, winner)
+            if content is True:
+                # HEAD probe: stream only the winning alignment to disk
+                content = _stream_to_file(alignment_url(pdb_id, chain, source, winner), output_path)
+                if not content:
+                    raise RuntimeError(f"region_num={winner} answered HEAD but returned no alignment")
             else:
-                print(error_msg.strip())
-        return None
+                # GET fallback already holds the body
+                write_alignment(output_path, content)
+            return winner, content
+    return None, None
+
+
+def _probe_region_once(pdb_id, chain, source, region_id, start_region_num,
+                       output_dir, max_retries=30):
+    """probe_region(), run at most once per run for identical arguments.
+
+    The first caller probes and downloads; concurrent or later duplicates
+    (identical annotation rows) wait for and share its result or exception.
+    """
+    key = (output_dir, pdb_id, chain, source, region_id, start_region_num)
+    with _RUN_PROBES_LOCK:
+        fut = _RUN_PROBES.get(key)
+        owner = fut is None
+        if owner:
+            fut = _RUN_PROBES[key] = Future()
+    if owner:
+        try:
+            fut.set_result(probe_region(pdb_id, chain, source, region_id, start_region_num,
+                                        output_dir=output_dir, max_retries=max_retries))
+        except BaseException as e:
+            fut.set_exception(e)
+    return fut.result()
 
 
 def parse_unit_count(fasta_content):
-    """Extract the maximum unit number from FASTA headers like '>unit.5.fasta'."""
+    """Extract the maximum unit number from FASTA headers like '>unit.5.fasta'.
+
+    `fasta_content` is the raw downloaded bytes; no decoding is needed.
+    """
     if not fasta_content:
         return 0
-    unit_numbers = []
-    for line in fasta_content.split("\n"):
-        if line.startswith(">unit."):
-            parts = line.split(".")
-            if len(parts) >= 2:
-                try:
-                    unit_numbers.append(int(parts[1]))
-                except ValueError:
-                    continue
-    return max(unit_numbers) if unit_numbers else 0
+    unit_numbers = _UNIT_RE.findall(fasta_content)
+    return max(map(int, unit_numbers)) if unit_numbers else 0
 
 
-def load_annotations(csv_path):
-    """Read annotations CSV and return list of dicts with pdb_id, chain, source, region_values."""
+def _parse_region_values(region_values_str):
+    """Parse a list column from the annotations CSV: a JSON array like '["3.3", "4.4"]',
+    or the Python repr "['3.3', '4.4']" written by older scraper runs."""
+    try:
+        return json.loads(region_values_str.replace("'", '"'))
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(region_values_str)
+    except Exception:
+        return []
+
+
+_ANNOTATION_COLUMNS = ("pdb_id", "chain", "source", "region_values")
+
+
+def _load_annotations_pandas(csv_path):
+    df = pd.read_csv(csv_path, usecols=lambda c: c in _ANNOTATION_COLUMNS,
+                     dtype=str, keep_default_na=False)
+    for col in _ANNOTATION_COLUMNS:
+        df[col] = df[col].str.strip() if col in df else ""
+    df = df[(df["pdb_id"] != "") & (df["chain"] != "")].copy()
+    df["region_values"] = df["region_values"].map(
+        lambda s: _parse_region_values(s) if s else [])
+    return df[list(_ANNOTATION_COLUMNS)].to_dict(orient="records")
+
+
+def _load_annotations_csv(csv_path):
     alignment_data = []
     with open(csv_path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -79,10 +430,7 @@ def load_annotations(csv_path):
             chain = (row.get("chain") or "").strip()
             source = (row.get("source") or "").strip()
             region_values_str = (row.get("region_values") or "[]").strip()
-            try:
-                region_values = ast.literal_eval(region_values_str)
-            except Exception:
-                region_values = []
+            region_values = _parse_region_values(region_values_str)
             if pdb and chain:
                 alignment_data.append({
                     "pdb_id": pdb,
@@ -93,6 +441,289 @@ def load_annotations(csv_path):
     return alignment_data
 
 
+def load_annotations(csv_path):
+    """Read annotations CSV and return list of dicts with pdb_id, chain, source, region_values.
+
+    Parsing uses pandas when it is installed. The parsed rows are cached in a
+    pickle next to the CSV, keyed on the CSV's mtime and size, so reruns over
+    an unchanged CSV skip parsing entirely.
+    """
+    cache_path = csv_path + ".cache.pkl"
+    cache_key = (os.path.getmtime(csv_path), os.path.getsize(csv_path))
+    try:
+        with open(cache_path, "rb") as f:
+            key, alignment_data = pickle.load(f)
+        if key == cache_key:
+            return alignment_data
+    except Exception:
+        pass
+
+    if pd is not None:
+        alignment_data = _load_annotations_pandas(csv_path)
+    else:
+        alignment_data = _load_annotations_csv(csv_path)
+
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump((cache_key, alignment_data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return alignment_data
+
+
+def start_error_log(error_log_path):
+    """Send the error logger's records to `error_log_path` via a background listener.
+
+    Records are buffered and written in batches; call stop_error_log() with the
+    returned listener to flush and close the file.
+    """
+    file_handler = logging.FileHandler(error_log_path, mode="a", encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(message)s"))
+    buffered = MemoryHandler(capacity=256, flushLevel=logging.CRITICAL, target=file_handler)
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, buffered)
+    _ERROR_LOGGER.addHandler(QueueHandler(log_queue))
+    _ERROR_LOGGER.setLevel(logging.INFO)
+    _ERROR_LOGGER.propagate = False
+    listener.start()
+    return listener
+
+
+def stop_error_log(listener):
+    """Stop a listener from start_error_log(), flushing pending records to disk."""
+    listener.stop()
+    for handler in list(_ERROR_LOGGER.handlers):
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            _ERROR_LOGGER.removeHandler(handler)
+    for handler in listener.handlers:
+        target = handler.target
+        handler.close()
+        target.close()
+
+
+def _progress(iterable, total, desc=None):
+    """tqdm wrapper that redraws at most once a second and stays quiet off-TTY."""
+    return tqdm.tqdm(iterable, total=total, desc=desc, mininterval=1.0,
+                     miniters=max(1, total // 200),
+                     disable=not getattr(sys.stderr, "isatty", lambda: False)())
+
+
+def _region_failure_msg(pdb_id, chain, region_id, start_region_num, max_retries):
+    if start_region_num > 0:
+        return (
+            f"Error fetching {pdb_id} {chain} region {region_id}: "
+            f"No alignment found from region_num {start_region_num} "
+            f"(stopped after {MAX_CONSECUTIVE_MISSES} consecutive misses)"
+        )
+    return (
+        f"Error fetching {pdb_id} {chain} region {region_id}: "
+        f"Failed after {max_retries} attempts "
+        f"(region_num {start_region_num} to "
+        f"{start_region_num + max_retries - 1})"
+    )
+
+
+def _alignment_regions(region_values):
+    """Region ids that have alignments; bare single-digit class labels (e.g. "3") do not."""
+    return [r for r in region_values if not (len(r) == 1 and r.isdigit())]
+
+
+def download_row(data, output_dir, max_retries=30):
+    """Download every region alignment for one annotation row.
+
+    Regions are probed sequentially because each region's starting
+    region_num depends on the unit count parsed from the previous one.
+    Returns the number of alignment files downloaded.
+    """
+    pdb_id = data["pdb_id"]
+    chain = data["chain"]
+    source = data["source"]
+    region_values = data.get("region_values", [])
+
+    downloads = 0
+    region_num = 0
+    for region_id in _alignment_regions(region_values):
+        try:
+            found_num, fasta_content = _probe_region_once(
+                pdb_id, chain, source, region_id, region_num,
+                output_dir=output_dir, max_retries=max_retries,
+            )
+        except Exception as e:
+            _ERROR_LOGGER.error(f"Error fetching {pdb_id} {chain} region {region_id} "
+                                f"(from region_num={region_num}): {e}")
+            continue
+        if found_num is not None:
+            downloads += 1
+            region_num = parse_unit_count(fasta_content)
+        else:
+            _ERROR_LOGGER.error(_region_failure_msg(
+                pdb_id, chain, region_id, region_num, max_retries))
+    return downloads
+
+
+# ---------- asyncio / aiohttp variant ----------
+async def _fetch_bytes_async(session, sem, url, retries=5, backoff=0.2):
+    """Async counterpart of _fetch_bytes(): None on 404, raises on other errors.
+
+    Rate limiting and transient server errors are retried with exponential backoff.
+    """
+    for attempt in range(retries + 1):
+        async with sem:
+            async with session.get(url) as r:
+                if r.status == 404:
+                    return None
+                if r.status not in RETRY_STATUSES or attempt == retries:
+                    r.raise_for_status()
+                    return await r.read()
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def _probe_exists_async(session, sem, url, retries=5, backoff=0.2):
+    """Async counterpart of _probe_exists(); raises instead of returning the error."""
+    global _HEAD_UNSUPPORTED
+    if _HEAD_UNSUPPORTED:
+        return await _fetch_bytes_async(session, sem, url, retries, backoff)
+    for attempt in range(retries + 1):
+        async with sem:
+            async with session.head(url, allow_redirects=True) as r:
+                if r.status == 404:
+                    return None
+                if _head_refused(r.status):
+                    break
+                if r.status not in RETRY_STATUSES or attempt == retries:
+                    r.raise_for_status()
+                    return True
+        await asyncio.sleep(backoff * 2 ** attempt)
+    result = await _fetch_bytes_async(session, sem, url, retries, backoff)
+    # GET works where HEAD did not: skip HEAD from now on
+    _HEAD_UNSUPPORTED = True
+    return result
+
+
+async def probe_region_async(session, sem, pdb_id, chain, source, region_id,
+                             start_region_num, output_dir, max_retries=30,
+                             window=PROBE_WINDOW):
+    """Async counterpart of probe_region()."""
+    end = start_region_num + max_retries
+    early_exit = start_region_num > 0
+    found_num, content = _existing_alignment(
+        output_dir, pdb_id, chain, region_id, range(start_region_num, end))
+    if found_num is not None:
+        return found_num, content
+
+    for base in range(start_region_num, end, window):
+        region_nums = list(range(base, min(base + window, end)))
+        results = await asyncio.gather(*[
+            _probe_exists_async(session, sem, alignment_url(pdb_id, chain, source, num))
+            for num in region_nums
+        ], return_exceptions=True)
+        misses = 0
+        for num, content in zip(region_nums, results):
+            if isinstance(content, Exception):
+                raise content
+            if content is True:
+                content = await _fetch_bytes_async(
+                    session, sem, alignment_url(pdb_id, chain, source, num))
+                if not content:
+                    raise RuntimeError(f"region_num={num} answered HEAD but returned no alignment")
+            if content:
+                output_path = alignment_output_path(output_dir, pdb_id, chain, region_id, num)
+                await asyncio.to_thread(_write_atomic, output_path, content)
+                return num, content
+            misses += 1
+            if early_exit and misses >= MAX_CONSECUTIVE_MISSES:
+                return None, None
+    return None, None
+
+
+async def download_row_async(session, sem, data, output_dir, max_retries=30):
+    """Async counterpart of download_row(); regions within a row stay sequential."""
+    pdb_id = data["pdb_id"]
+    chain = data["chain"]
+    source = data["source"]
+    region_values = data.get("region_values", [])
+
+    downloads = 0
+    region_num = 0
+    for region_id in _alignment_regions(region_values):
+        try:
+            # identical rows share one probe task per run (see _RUN_PROBES)
+            key = (output_dir, pdb_id, chain, source, region_id, region_num)
+            task = _RUN_PROBES.get(key)
+            if task is None:
+                task = _RUN_PROBES[key] = asyncio.ensure_future(probe_region_async(
+                    session, sem, pdb_id, chain, source, region_id, region_num,
+                    output_dir=output_dir, max_retries=max_retries,
+                ))
+            found_num, fasta_content = await task
+        except Exception as e:
+            _ERROR_LOGGER.error(f"Error fetching {pdb_id} {chain} region {region_id} "
+                                f"(from region_num={region_num}): {e}")
+            continue
+        if found_num is not None:
+            downloads += 1
+            region_num = parse_unit_count(fasta_content)
+        else:
+            _ERROR_LOGGER.error(_region_failure_msg(
+                pdb_id, chain, region_id, region_num, max_retries))
+    return downloads
+
+
+async def download_all_async(alignment_data, output_dir,
+                             concurrency=64, desc=None):
+    """Download alignments for all rows on one event loop with aiohttp.
+
+    At most `concurrency` requests are in flight at once; the connection pool
+    is sized to match. Returns the number of alignment files downloaded.
+    """
+    import aiohttp
+
+    _reset_run_caches()
+    sem = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=30)
+    total_downloads = 0
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={"Accept": "text/plain"}) as session:
+        tasks = [
+            download_row_async(session, sem, data, output_dir)
+            for data in alignment_data
+        ]
+        for coro in _progress(asyncio.as_completed(tasks), len(tasks), desc):
+            total_downloads += await coro
+    return total_downloads
+
+
+def aiohttp_available():
+    """True if aiohttp is installed, i.e. the asyncio download path can be used."""
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+def download_alignments(alignment_data, output_dir, workers=32, use_async=False, desc=None):
+    """Download alignments for every row of `alignment_data` into `output_dir`.
+
+    Rows run concurrently on a thread pool of `workers`, or on an asyncio event
+    loop with aiohttp when `use_async` is set, with `workers` as the limit on
+    in-flight requests. Returns once every file is on disk, with the number of
+    alignment files downloaded.
+    """
+    _reset_run_caches()
+    if use_async:
+        return asyncio.run(download_all_async(alignment_data, output_dir,
+                                              concurrency=max(1, workers), desc=desc))
+
+    def _download(data):
+        return download_row(data, output_dir)
+
+    total_downloads = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(_download, alignment_data)
+        for downloads in _progress(results, len(alignment_data), desc):
+            total_downloads += downloads
+    flush_writes()
+    return total_downloads
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Download RepeatsDB alignment FASTAs from an annotations CSV"
@@ -106,6 +737,19 @@ def main():
         required=True,
         help="Directory to save alignment files (region subdirs created automatically)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=32,
+        help="Concurrent alignment downloads: thread-pool size, or the in-flight request "
+             "limit with aiohttp (default: 32)",
+    )
+    parser.add_argument(
+        "--no-async",
+        action="store_true",
+        help="Download alignments on a thread pool instead of asyncio + aiohttp "
+             "(also used automatically when aiohttp is not installed)",
+    )
     args = parser.parse_args()
 
     input_csv = args.input_csv
@@ -124,51 +768,17 @@ def main():
     error_log_path = os.path.join(output_dir, f"{csv_basename}_alignment_errors.log")
 
     total_downloads = 0
-    with open(error_log_path, "a", encoding="utf-8") as error_log:
-        error_log.write(f"Started alignments download: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        error_log.write(f"Input CSV: {input_csv}\n")
-        error_log.write("=" * 60 + "\n\n")
-
-        for data in tqdm.tqdm(alignment_data, desc=csv_basename):
-            pdb_id = data["pdb_id"]
-            chain = data["chain"]
-            source = data["source"]
-            region_values = data.get("region_values", [])
-
-            region_num = 0
-            for region_id in region_values:
-                if len(region_id) == 1 and region_id.isdigit():
-                    continue
-
-                original_region_num = region_num
-                fasta_content = None
-                max_retries = 30
-
-                for attempt in range(max_retries):
-                    current_region_num = original_region_num + attempt
-                    fasta_content = fetch_alignment(
-                        pdb_id, chain, source,
-                        region_num=current_region_num,
-                        region_id=region_id,
-                        output_dir=output_dir,
-                        error_log=error_log,
-                        silent=True,
-                    )
-                    if fasta_content:
-                        total_downloads += 1
-                        region_num = parse_unit_count(fasta_content)
-                        break
-
-                if not fasta_content:
-                    error_msg = (
-                        f"Error fetching {pdb_id} {chain} region {region_id}: "
-                        f"Failed after {max_retries} attempts "
-                        f"(region_num {original_region_num} to "
-                        f"{original_region_num + max_retries - 1})\n"
-                    )
-                    error_log.write(error_msg)
-                    error_log.flush()
-                    region_num = original_region_num
+    listener = start_error_log(error_log_path)
+    try:
+        _ERROR_LOGGER.info(f"Started alignments download: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        _ERROR_LOGGER.info(f"Input CSV: {input_csv}")
+        _ERROR_LOGGER.info("=" * 60 + "\n")
+
+        total_downloads = download_alignments(
+            alignment_data, output_dir, workers=args.workers,
+            use_async=not args.no_async and aiohttp_available(), desc=csv_basename)
+    finally:
+        stop_error_log(listener)
 
     print(f"Downloaded {total_downloads} alignment files.")
     print(f"Errors logged to: {error_log_path}")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Shared requests.Session factory for the RepeatsDB scripts.
+
+Each script keeps one session per process so keep-alive connections are reused
+across requests; only the retry and connection-pool settings differ.
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Rate-limit and transient server errors worth retrying on the same URL.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def make_session(retries, backoff_factor, pool_connections, pool_maxsize,
+                 allowed_methods=("GET",), schemes=("https://", "http://"),
+                 headers=None) -> requests.Session:
+    """Build a requests.Session that retries RETRY_STATUSES and pools connections."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=backoff_factor,
+                  status_forcelist=RETRY_STATUSES,
+                  allowed_methods=list(allowed_methods))
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry)
+    for scheme in schemes:
+        session.mount(scheme, adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def lazy_session(**settings):
+    """Return a get_session() that builds make_session(**settings) on its first call.
+
+    The session is created lazily (and under a lock, for worker threads) so
+    spawned child processes build their own instead of inheriting one.
+    """
+    session = None
+    lock = threading.Lock()
+
+    def get_session() -> requests.Session:
+        """Return the process-wide requests.Session, creating it on first use."""
+        nonlocal session
+        with lock:
+            if session is None:
+                session = make_session(**settings)
+        return session
+
+    return get_session
@@ -1,44 +1,61 @@
 import time
+import base64
 import re
+import csv
+import json
 import os
-import requests
-import tqdm
 import argparse
-from bs4 import BeautifulSoup
+import logging
+import lxml.html as LH
 import datetime
 import sys
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select, WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import multiprocessing
+import tqdm
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select, WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+except ImportError:  # optional: only the scrape step drives Chrome
+    webdriver = None
+
+from fetch_alignments import (aiohttp_available, download_alignments, load_annotations,
+                              start_error_log, stop_error_log)
+
+# Progress messages; main() attaches a console and a log-file handler
+_LOGGER = logging.getLogger("repeatsdb.scrape")
 
 # ---------- pagination ----------
 def get_current_table_html(driver):
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    table = soup.find("table")
-    return str(table) if table else ""
+    # ask Chrome for the table alone instead of serialising and reparsing the whole page
+    return driver.execute_script("const t=document.querySelector('table');return t? t.outerHTML:''")
+
+_FINGERPRINT_JS = (
+    "const r=document.querySelectorAll('table tbody tr');"
+    "return r.length? r.length+'|'+r[0].innerText.slice(0,64):''"
+)
+
+def table_fingerprint(driver):
+    """Cheap signature of the rendered table (row count + start of the first row), computed in the browser."""
+    return driver.execute_script(_FINGERPRINT_JS)
 
-def set_page_size(driver, value="100", sleep_s=1, timeout=15):
+def set_page_size(driver, value="100", timeout=15):
     sel = WebDriverWait(driver, 20).until(
         EC.presence_of_element_located((By.CSS_SELECTOR, "app-pagination-widget select[aria-label='Page size']"))
     )
-    prev_table = get_current_table_html(driver)
-    Select(sel).select_by_value(value)
-    # Wait for table to update; fall back to a short sleep if JS is slow
+    select = Select(sel)
+    current = select.first_selected_option
+    if value in (current.get_attribute("value"), current.text.strip()):
+        return  # the URL's limit= already applied this page size; nothing to reload
+    prev_table = table_fingerprint(driver)
+    select.select_by_value(value)
+    # Wait for table to update; returns as soon as the rows change
     try:
-        WebDriverWait(driver, timeout).until(lambda d: get_current_table_html(d) != prev_table)
-    except Exception:
-        # incremental fallback
-        total = 0
-        waits = [0.5, 1, 2]
-        for w in waits:
-            time.sleep(w)
-            total += w
-            if get_current_table_html(driver) != prev_table:
-                break
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: table_fingerprint(d) != prev_table)
+    except TimeoutException:
+        pass  # same rows (or slow JS); the page loop re-checks for records
 
 def read_page_index(driver):
     try:
@@ -47,53 +64,120 @@ def read_page_index(driver):
     except:
         return ""
 
-def click_next_page(driver, sleep_s=1):
-    """Click next page; return True if navigation likely happened. Uses incremental backoff waiting for page index change."""
-    items = driver.find_elements(By.CSS_SELECTOR, "app-pagination-widget ul.pagination li.page-item")
-    if not items:
+# Finds the item after the active one, skips it if disabled, and clicks it in one
+# round trip; returns the page index before the click, or null if there is no next page.
+_CLICK_NEXT_JS = """
+const items = document.querySelectorAll("app-pagination-widget ul.pagination li.page-item");
+let a = -1;
+for (let i = 0; i < items.length; i++) if (items[i].classList.contains('active')) { a = i; break; }
+if (a < 0 || a + 1 >= items.length) return null;
+const nxt = items[a + 1];
+if (nxt.classList.contains('disabled')) return null;
+const idx = document.querySelector("app-pagination-widget input[formcontrolname='index']");
+const before = (idx && idx.value) || '';
+const el = nxt.querySelector('a,button,span') || nxt;
+el.scrollIntoView({block: 'center'});
+el.click();
+return before;
+"""
+
+def click_next_page(driver, timeout=15):
+    """Click next page; return True if navigation likely happened. Polls until the page index changes."""
+    before_idx = driver.execute_script(_CLICK_NEXT_JS)
+    if before_idx is None:
+        return False  # no enabled 'next'
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: read_page_index(d) != before_idx)
+        return True
+    except TimeoutException:
         return False
 
-    # find active li
-    active_i = None
-    for i, li in enumerate(items):
-        if "active" in (li.get_attribute("class") or "").lower():
-            active_i = i
-            break
-    if active_i is None or active_i + 1 >= len(items):
-        return False  # no 'next'
+# ---------- scraping ----------
+_CSV_HEADER = ["index", "pdb_id", "chain", "source", "region_values",
+               "region_units", "uniprot", "pfam", "status"]
 
-    next_li = items[active_i + 1]
-    # skip if disabled
-    if "disabled" in (next_li.get_attribute("class") or "").lower():
-        return False
+def _csv_row(rec):
+    """CSV cells for a parsed record, in _CSV_HEADER order; list columns are JSON arrays."""
+    return (rec["index"], rec["pdb_id"], rec["chain"], rec["source"],
+            json.dumps(rec["region_values"]), json.dumps(rec["region_units"]),
+            str(rec["uniprot"]), json.dumps(rec["pfam"]), rec["status"])
+
+def _record_key(rec):
+    """Dedup key for a table record: "pdb_id|chain" packed into one int.
+
+    The whole string is packed (not just the first chain letter) so multi-letter chains
+    and UniProt accessions cannot collide; a small int is cheaper to hold and hash than a str.
+    """
+    return int.from_bytes(f"{rec['pdb_id']}|{rec['chain']}".encode(), "little")
 
-    before_idx = read_page_index(driver)
+# Subresources the table never needs; blocked at the network layer via CDP
+_BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.css", "*.map",
+    "*google-analytics*", "*googletagmanager*", "*/analytics*",
+]
 
-    # click
+def block_heavy_resources(driver):
+    """Stop Chrome from fetching images, fonts, stylesheets and trackers at all."""
     try:
-        clickable = next_li.find_element(By.CSS_SELECTOR, "a,button,span")
-    except:
-        clickable = next_li
-    driver.execute_script("arguments[0].scrollIntoView({block:'center'});", clickable)
-    driver.execute_script("arguments[0].click();", clickable)
-
-    # incremental backoff: check for index change, increasing wait if not yet changed
-    waits = [sleep_s, sleep_s * 2, sleep_s * 4, sleep_s * 8]
-    for w in waits:
-        time.sleep(w)
-        after_idx = read_page_index(driver)
-        if after_idx != before_idx:
-            return True
-    # final check using WebDriverWait (short)
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        # not fatal: the images pref still skips rendering them
+        _LOGGER.warning(f"Could not block subresources via CDP: {e}")
+
+def drain_json_responses(driver):
+    """Return [(url, payload)] for the JSON responses Chrome received since the last call.
+
+    Reads the performance log of a driver started with capture_network=True and
+    pulls each body over CDP (Network.getResponseBody), so the data the table is
+    rendered from can be inspected without going through the DOM.
+    """
+    responses = []
+    for entry in driver.get_log("performance"):
+        msg = json.loads(entry["message"])["message"]
+        if msg.get("method") != "Network.responseReceived":
+            continue
+        response = msg["params"]["response"]
+        if "json" not in (response.get("mimeType") or ""):
+            continue
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": msg["params"]["requestId"]})
+            text = base64.b64decode(body["body"]).decode() if body.get("base64Encoded") else body["body"]
+            responses.append((response["url"], json.loads(text)))
+        except Exception as e:
+            # bodies of redirects/evicted requests are gone; nothing to report
+            _LOGGER.debug(f"No JSON body for {response['url']}: {e}")
+    return responses
+
+def has_performance_log(driver):
+    """True if `driver` records Chrome's performance log (capture_network=True)."""
     try:
-        WebDriverWait(driver, 5).until(lambda d: read_page_index(d) != before_idx)
-        return True
+        driver.get_log("performance")
     except Exception:
         return False
-
-# ---------- scraping ----------
-def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, sleep_s=1, sleep_limit_per_page=20, output_csv=None, profile_dir=None):
-    url = f"https://repeatsdb.org/annotations?updated.by=user,predictor,mapping&limit={page_size}&region.classes={region_classes}"
+    return True
+
+def _json_shape(payload):
+    if isinstance(payload, list):
+        return f"{len(payload)} items"
+    if isinstance(payload, dict):
+        return f"keys {sorted(payload)[:10]}"
+    return type(payload).__name__
+
+def make_chrome_driver(profile_dir=None, headless=True, disk_cache_dir=None, capture_network=False):
+    """Start a Chrome WebDriver configured for scraping.
+
+    Callers that scrape several region classes can create one driver here and pass
+    it to scrape_annotations() for each of them instead of paying browser startup
+    every time. `disk_cache_dir` keeps Chrome's HTTP cache (the RepeatsDB bundle)
+    on disk across runs, as `profile_dir` does for the rest of the profile.
+    `capture_network` turns on the performance log read by drain_json_responses().
+    """
+    if webdriver is None:
+        raise RuntimeError("scraping annotations requires selenium; "
+                           "use --fetch-alignments-only to reuse an existing CSV")
     # Configure Chrome to load faster: disable images/extensions and use eager pageLoadStrategy
     chrome_opts = Options()
     chrome_opts.add_argument("--no-sandbox")
@@ -101,13 +185,24 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
     chrome_opts.add_argument("--disable-extensions")
     chrome_opts.add_argument("--disable-gpu")
     chrome_opts.add_argument("--window-size=1200,800")
-    # optional: headless can be enabled if UI is not needed
-    # chrome_opts.add_argument("--headless=new")
+    # suppress background Chrome activity that competes with the scrape
+    chrome_opts.add_argument("--disable-background-networking")
+    chrome_opts.add_argument("--disable-sync")
+    chrome_opts.add_argument("--metrics-recording-only")
+    chrome_opts.add_argument("--disable-default-apps")
+    chrome_opts.add_argument("--no-first-run")
+    chrome_opts.add_argument("--disable-translate")
+    chrome_opts.add_argument("--disable-features=Translate,BackForwardCache")
+    # no window/compositor unless a visible browser was requested for debugging
+    if headless:
+        chrome_opts.add_argument("--headless=new")
     # block images to speed up network/load
     chrome_prefs = {"profile.managed_default_content_settings.images": 2}
     chrome_opts.add_experimental_option("prefs", chrome_prefs)
     # prefer DOM readiness over full resource load
     chrome_opts.set_capability("pageLoadStrategy", "eager")
+    if capture_network:
+        chrome_opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
     # Reuse a persistent Chrome profile if requested to avoid startup overhead
     if profile_dir:
@@ -116,7 +211,39 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
         os.makedirs(profile_dir, exist_ok=True)
         chrome_opts.add_argument(f"--user-data-dir={profile_dir}")
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_opts)
+    if disk_cache_dir:
+        disk_cache_dir = os.path.abspath(os.path.expanduser(disk_cache_dir))
+        os.makedirs(disk_cache_dir, exist_ok=True)
+        chrome_opts.add_argument(f"--disk-cache-dir={disk_cache_dir}")
+
+    # Selenium Manager (selenium >= 4.6) resolves a matching chromedriver locally
+    driver = webdriver.Chrome(options=chrome_opts)
+    block_heavy_resources(driver)
+    return driver
+
+
+def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, sleep_s=1, sleep_limit_per_page=20, output_csv=None, profile_dir=None, headless=True, resume=False, driver=None, disk_cache_dir=None, log_api=False):
+    """Scrape the annotations table page by page into `output_csv`.
+
+    With `resume`, keys already in an existing `output_csv` are skipped, new rows are
+    appended, and scraping stops at the first page (after the first two) that adds
+    nothing new; only newly seen records are returned for alignment download.
+
+    A `driver` from make_chrome_driver() is reused and left open; otherwise one is
+    started from `profile_dir`/`headless`/`disk_cache_dir` and quit when done.
+
+    With `log_api`, the URL and shape of every JSON response behind each page are
+    logged. A caller-supplied driver needs capture_network=True (see
+    make_chrome_driver()); without it `log_api` is turned off with a warning.
+    """
+    url = f"https://repeatsdb.org/annotations?updated.by=user,predictor,mapping&limit={page_size}&region.classes={region_classes}"
+    own_driver = driver is None
+    if own_driver:
+        driver = make_chrome_driver(profile_dir, headless, disk_cache_dir, capture_network=log_api)
+    if log_api and not has_performance_log(driver):
+        _LOGGER.warning("Not logging JSON responses: the driver has no performance log "
+                        "(start it with make_chrome_driver(capture_network=True))")
+        log_api = False
     
     # Track unique records and minimal data for alignments
     seen_keys = set()
@@ -126,10 +253,20 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
     # Open CSV file for writing
     csv_file = None
     csv_writer = None
+    resume = resume and bool(output_csv) and os.path.isfile(output_csv)
+    if resume:
+        with open(output_csv, newline='', encoding='utf-8') as fp:
+            seen_keys.update(_record_key(row) for row in csv.DictReader(fp))
+        _LOGGER.info(f"Resuming: {len(seen_keys)} records already in {output_csv}")
     if output_csv:
-        csv_file = open(output_csv, 'w', newline='', encoding='utf-8')
+        csv_file = open(output_csv, 'a' if resume else 'w', newline='', encoding='utf-8')
+        csv_writer = csv.writer(csv_file, quoting=csv.QUOTE_ALL)
+    if csv_writer and not resume:
         # Write header
-        csv_file.write("index,pdb_id,chain,source,region_values,region_units,uniprot,pfam,status\n")
+        csv_writer.writerow(_CSV_HEADER)
+    # One in-place progress line instead of a printed line per page
+    pages = tqdm.tqdm(total=max_pages, desc=f"Scraping {region_classes}", unit="page", mininterval=1.0,
+                      disable=not getattr(sys.stderr, "isatty", lambda: False)())
     
     try:
         driver.get(url)
@@ -139,57 +276,41 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
         except Exception:
             # fallback short sleep if waiting failed
             time.sleep(sleep_s)
-        # Capture initial page results (they appear immediately on first load)
-        initial_html = get_current_table_html(driver)
-        initial_records = parse_table(initial_html)
-        for rec in initial_records:
-            key = (rec['pdb_id'], rec['chain'])
-            if key not in seen_keys:
-                seen_keys.add(key)
-                total_records += 1
-                alignment_data.append({
-                    'pdb_id': rec['pdb_id'],
-                    'chain': rec['chain'],
-                    'source': rec['source'],
-                    'region_values': rec['region_values']
-                })
-                if csv_file:
-                    region_values_str = str(rec['region_values'])
-                    region_units_str = str(rec['region_units'])
-                    pfam_str = str(rec['pfam'])
-                    csv_file.write(f'"{rec["index"]}","{rec["pdb_id"]}","{rec["chain"]}","{rec["source"]}","{region_values_str}","{region_units_str}","{rec["uniprot"]}","{pfam_str}","{rec["status"]}"\n')
-
-        # Then set page size (may reload table); dedup via seen_keys
-        set_page_size(driver, str(page_size), sleep_s=sleep_s)
+        # The URL's limit= normally sets the page size; only touch the widget if it was ignored,
+        # so page 1 is parsed once, at its final size, by the loop below
+        set_page_size(driver, str(page_size))
 
         page_num = 0
         while max_pages is None or page_num < max_pages:
-            total_sleep_time_per_page = 0
-            print("Scraping page ", page_num + 1, "...")
             # scrape current page
             html = get_current_table_html(driver)
             page_records = parse_table(html)
 
-            # If no records, wait and try again (up to sleep limit)
-            while not page_records:
-                    time.sleep(sleep_s)
-                    total_sleep_time_per_page += sleep_s
-                    new_html = get_current_table_html(driver)
-                    page_records = parse_table(new_html)
-                    if page_records or total_sleep_time_per_page >= sleep_limit_per_page:
-                        print(f"Waited {total_sleep_time_per_page}s for page {page_num + 1}, continuing...")
-                        break
+            # If no records yet, poll until rows render (up to sleep limit); the wait returns the records
+            if not page_records:
+                try:
+                    page_records = WebDriverWait(driver, sleep_limit_per_page, poll_frequency=0.25).until(
+                        lambda d: parse_table(get_current_table_html(d)))
+                except TimeoutException:
+                    _LOGGER.info(f"Waited {sleep_limit_per_page}s for page {page_num + 1}, continuing...")
+
+            if log_api:
+                for api_url, payload in drain_json_responses(driver):
+                    _LOGGER.info(f"Page {page_num + 1} JSON response: {api_url} ({_json_shape(payload)})")
 
             if not page_records:
-                print(f"No records found on page {page_num + 1}, ending scrape.")
+                _LOGGER.info(f"No records found on page {page_num + 1}, ending scrape.")
                 break
 
             # Write records to CSV and track for alignments
+            rows_to_write = []
+            page_new = 0
             for rec in page_records:
-                key = (rec['pdb_id'], rec['chain'])
+                key = _record_key(rec)
                 if key not in seen_keys:
                     seen_keys.add(key)
                     total_records += 1
+                    page_new += 1
 
                     # Save minimal data for alignments
                     alignment_data.append({
@@ -199,14 +320,17 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
                         'region_values': rec['region_values']
                     })
 
-                    # Write to CSV
-                    if csv_file:
-                        # Convert lists to string representation
-                        region_values_str = str(rec['region_values'])
-                        region_units_str = str(rec['region_units'])
-                        pfam_str = str(rec['pfam'])
+                    if csv_writer:
+                        rows_to_write.append(_csv_row(rec))
+            if csv_writer:
+                csv_writer.writerows(rows_to_write)
+            pages.update(1)
+            pages.set_postfix(records=total_records, refresh=False)
 
-                        csv_file.write(f'"{rec["index"]}","{rec["pdb_id"]}","{rec["chain"]}","{rec["source"]}","{region_values_str}","{region_units_str}","{rec["uniprot"]}","{pfam_str}","{rec["status"]}"\n')
+            # Resuming: once a page past the first two adds nothing, the rest is already known
+            if resume and page_num >= 2 and not page_new:
+                _LOGGER.info(f"Page {page_num + 1} has no new records, stopping resumed scrape.")
+                break
 
             # If fewer records than page_size, assume this is the last page
             per_page_count = len(page_records)
@@ -215,8 +339,8 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
 
             # If we have exactly page_size results, attempt to go to next page
             if per_page_count == page_size:
-                # try to go to next page; sleep 3s in click_next_page
-                if not click_next_page(driver, sleep_s=sleep_s):
+                # try to go to next page; waits for the page index to change
+                if not click_next_page(driver):
                     break
 
                 page_num += 1
@@ -227,38 +351,98 @@ def scrape_annotations(region_classes="3.3", page_size=100, max_pages=None, slee
 
         return alignment_data, total_records
     finally:
-        driver.quit()
+        pages.close()
+        if own_driver:
+            driver.quit()
         if csv_file:
             csv_file.close()
 
+def _scrape_shard(kwargs):
+    # spawned workers start without main()'s handlers; report progress on the console
+    if not _LOGGER.handlers:
+        _LOGGER.addHandler(logging.StreamHandler(sys.stdout))
+        _LOGGER.setLevel(logging.INFO)
+        _LOGGER.propagate = False
+    return scrape_annotations(**kwargs)
+
+def scrape_sharded(shards, output_csv=None, profile_dir=None, disk_cache_dir=None, **scrape_kwargs):
+    """Scrape each region class in `shards` with its own Chrome, in parallel, and merge the results.
+
+    Each shard writes `<output_csv stem>.<shard>.csv` and uses `<profile_dir>-<shard>` and
+    `<disk_cache_dir>-<shard>` (Chrome locks a user-data-dir and its cache). Shard CSVs are merged into `output_csv` in shard order, dropping
+    records already seen in an earlier shard, and then removed.
+    """
+    base = os.path.splitext(output_csv)[0] if output_csv else None
+    tasks = [
+        dict(scrape_kwargs, region_classes=shard,
+             output_csv=f"{base}.{shard}.csv" if base else None,
+             profile_dir=f"{profile_dir}-{shard}" if profile_dir else None,
+             disk_cache_dir=f"{disk_cache_dir}-{shard}" if disk_cache_dir else None)
+        for shard in shards
+    ]
+    with multiprocessing.get_context("spawn").Pool(len(tasks)) as pool:
+        results = pool.map(_scrape_shard, tasks)
+
+    seen_keys = set()
+    alignment_data = []
+    for shard_data, _ in results:
+        for rec in shard_data:
+            key = _record_key(rec)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                alignment_data.append(rec)
+
+    if output_csv:
+        merged_keys = set()
+        with open(output_csv, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.DictWriter(out, fieldnames=_CSV_HEADER, quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            for task in tasks:
+                with open(task["output_csv"], newline='', encoding='utf-8') as fp:
+                    rows = [row for row in csv.DictReader(fp) if _record_key(row) not in merged_keys]
+                merged_keys.update(_record_key(row) for row in rows)
+                writer.writerows(rows)
+                os.remove(task["output_csv"])
+
+    return alignment_data, len(alignment_data)
+
 # ---------- table parsing ----------
-NUM_RE = re.compile(r"\d+(?:\.\d+)*(?!\s*units)", re.I)
-UNITS_RE = re.compile(r"\b\d+\s*units\b", re.I)
+# Unit counts ("6 units") are tried first so their digits never leak into region values
+_COMBO_RE = re.compile(r"(?P<units>\b\d+\s*units\b)|(?P<num>\d+(?:\.\d+)*)", re.I)
+
+def _has_class_xp(cls):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+# Only rows carrying a structure preview image are annotation records
+_ROWS_XP = LH.etree.XPath("//tbody//tr[.//td//img[contains(@src, 'preview')]]")
+_ALL_ROWS_XP = LH.etree.XPath("//tr[.//td//img[contains(@src, 'preview')]]")
+_TD_XP = LH.etree.XPath("./td")
+_REGION_XP = LH.etree.XPath(f".//*[{_has_class_xp('text-bg-region')}]")
+_BADGE_XP = LH.etree.XPath(f".//*[{_has_class_xp('badge')}]")
+
+def _text(el, sep=""):
+    """Stripped text of `el`, joining its non-empty text nodes with `sep`."""
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
 
 def parse_row(tr):
-    tds = tr.find_all("td", recursive=False)
+    tds = _TD_XP(tr)
     if len(tds) < 8:
         return None
 
-    index = tds[0].get_text(strip=True)
-    img = tds[1].find("img")
-    #preview_img = img["src"] if img and img.has_attr("src") else None
-    pdb_id = tds[2].get_text(strip=True)
-    chain = tds[3].get_text(strip=True)
-    source = tds[4].get_text(" ", strip=True)
+    index = _text(tds[0])
+    pdb_id = _text(tds[2])
+    chain = _text(tds[3])
+    source = _text(tds[4], " ")
 
-    # multiple region spans
-    region_cell = tds[5]
+    # multiple region spans, scanned as one space-joined string
+    region_text = " ".join(_text(span, " ") for span in _REGION_XP(tds[5]))
     region_values, region_units = [], []
-    for region_span in region_cell.select(".text-bg-region"):
-        region_text = region_span.get_text(" ", strip=True)
-        for m in NUM_RE.findall(region_text):
-            region_values.append(m)  # keep as string "3.3.1" etc
-        for m in UNITS_RE.findall(region_text):
-            region_units.append(m)
+    for m in _COMBO_RE.finditer(region_text):
+        # keep values as strings "3.3.1" etc
+        (region_units if m.lastgroup == "units" else region_values).append(m.group())
 
     ext_cell = tds[6]
-    badges = [b.get_text(" ", strip=True) for b in ext_cell.select(".badge")]
+    badges = [_text(b, " ") for b in _BADGE_XP(ext_cell)]
     uniprot = None
     pfam = []
     for b in badges:
@@ -267,11 +451,10 @@ def parse_row(tr):
         elif "Pfam" in b:
             pfam.append(b.split()[0])
 
-    status = tds[7].get_text(strip=True)
+    status = _text(tds[7])
 
     return {
         "index": index,
-        #"preview_img": preview_img,
         "pdb_id": pdb_id,
         "chain": chain,
         "source": source,
@@ -283,82 +466,25 @@ def parse_row(tr):
     }
 
 def parse_table(table_html):
-    soup = BeautifulSoup(table_html, "html.parser")
-    rows = soup.select("tbody tr") or soup.select("tr")
+    if not table_html:
+        return []
+    root = LH.fromstring(table_html)
+    rows = _ROWS_XP(root) or _ALL_ROWS_XP(root)
     out = []
     for tr in rows:
-        if tr.select_one("td[rowspan] img[src*='preview']") or tr.select_one("td img[src*='preview']"):
-            rec = parse_row(tr)
-            if rec: out.append(rec)
+        rec = parse_row(tr)
+        if rec: out.append(rec)
     return out
 
 
-# ---------- download MSAs ----------
-def fetch_alignment(pdb_id, chain, source, region_num, region_id, output_dir="repeatsDB_alignments", error_log=None, silent=False):
-    """
-    Download alignment FASTA for a specific region.
-    Returns the content if successful, None otherwise.
-
-    Args:
-        silent: If True, suppress all error messages (used during retries)
-    """
-    if source == "AlphaFoldDB":
-        db_id = "adb"
-        url = f"https://repeatsdb.org/api/public/production/{db_id}/{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta"
-    else:
-        db_id = pdb_id[1:3]  # 'a1' for '1a17'
-        url = f"https://repeatsdb.org/api/public/production/pdb/{db_id}/{pdb_id}.{chain}/region.{region_num}/sequence_alignment.fasta"
-
-    # Create region-specific directory
-    region_dir_name = f"repeatsDB_alignments_{region_id.replace('.', '_')}"
-    region_output_dir = os.path.join(output_dir, region_dir_name)
-    os.makedirs(region_output_dir, exist_ok=True)
-
-    output_path = os.path.join(region_output_dir, f"{pdb_id}_{chain}_{region_id}_{region_num}.fasta")
-    try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        content = r.content
-        with open(output_path, "wb") as f:
-            f.write(content)
-        return content.decode('utf-8', errors='ignore')
-    except Exception as e:
-        if not silent:
-            error_msg = f"Error fetching {pdb_id} {chain} region {region_id} (region_num={region_num}) from {url}: {e}\n"
-            if error_log:
-                error_log.write(error_msg)
-                error_log.flush()
-            else:
-                print(error_msg.strip())
-        return None
-
+# ---------- main ----------
+def main(argv=None, driver=None):
+    """Command-line entry point.
 
-def parse_unit_count(fasta_content):
+    In-process callers (run_pipeline) may pass a `driver` from make_chrome_driver()
+    to reuse one browser across calls; it is left open, and the Chrome options
+    (--headful, --chrome-profile-dir, --chrome-cache-dir) and --shards do not apply to it.
     """
-    Parse a FASTA file content and extract the maximum unit number.
-    Looks for sequences with headers like '>unit.5.fasta'
-    Returns the maximum unit number found, or 0 if none found.
-    """
-    if not fasta_content:
-        return 0
-
-    unit_numbers = []
-    for line in fasta_content.split('\n'):
-        if line.startswith('>unit.'):
-            # Extract number from '>unit.5.fasta' format
-            parts = line.split('.')
-            if len(parts) >= 2:
-                try:
-                    num = int(parts[1])
-                    unit_numbers.append(num)
-                except ValueError:
-                    continue
-
-    return max(unit_numbers) if unit_numbers else 0
-
-
-# ---------- main ----------
-if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Scrape RepeatsDB annotations and alignments")
     parser.add_argument(
@@ -367,6 +493,13 @@ if __name__ == "__main__":
         default="3.3",
         help="Region classes to filter by (default: 3.3)"
     )
+    parser.add_argument(
+        "--shards",
+        type=str,
+        default=None,
+        help="Comma-separated region classes (e.g. 3.3,3.4,4.1) scraped in parallel, one Chrome "
+             "each, and merged into --output-csv; replaces --region-classes"
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -385,6 +518,30 @@ if __name__ == "__main__":
         default=None,
         help="Path to Chrome user-data-dir to reuse profile and cache (optional)"
     )
+    parser.add_argument(
+        "--chrome-cache-dir",
+        type=str,
+        default=None,
+        help="Path to a persistent Chrome disk cache so site assets are reused across runs "
+             "(optional, e.g. ~/.cache/repeatsdb_chrome)"
+    )
+    parser.add_argument(
+        "--log-api-responses",
+        action="store_true",
+        help="Log the JSON (XHR) responses the annotations page loads, via Chrome's network log (for debugging)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to an existing --output-csv, skipping records already in it, and stop at the "
+             "first page (after page 2) with no new records. Fast incremental refresh; may miss "
+             "records inserted deep in the listing"
+    )
+    parser.add_argument(
+        "--headful",
+        action="store_true",
+        help="Show the Chrome window instead of running headless (for debugging)"
+    )
     parser.add_argument(
         "--max-pages",
         type=int,
@@ -407,8 +564,24 @@ if __name__ == "__main__":
         action="store_true",
         help="Do not run the web scraper; instead read the annotations CSV and download alignments only"
     )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=32,
+        help="Concurrent alignment downloads: thread-pool size, or the in-flight request "
+             "limit with aiohttp (default: 32)"
+    )
+    parser.add_argument(
+        "--no-async",
+        action="store_true",
+        help="Download alignments on a thread pool instead of asyncio + aiohttp "
+             "(also used automatically when aiohttp is not installed)"
+    )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    shards = [c.strip() for c in args.shards.split(",") if c.strip()] if args.shards else None
+    if shards and args.resume:
+        parser.error("--resume cannot be combined with --shards")
     
     ### inputs
     page_size = args.page_size
@@ -417,6 +590,8 @@ if __name__ == "__main__":
     region_classes = args.region_classes
     profile_dir = args.chrome_profile_dir
     fetch_alignments_only = args.fetch_alignments_only
+    download_workers = args.download_workers
+    use_async = not args.no_async and aiohttp_available()
 
     job_id = datetime.datetime.now().strftime("%Y%m%d")
     output_dir = args.output_dir or f"./result-alignments/repeatsDB_alignments_{job_id}"
@@ -432,147 +607,89 @@ if __name__ == "__main__":
     # Prepare combined error/log file (append so existing file is preserved)
     error_log_path = output_csv.replace('.csv', '.log')
 
-    # Tee class to write to both console and log file
-    class Tee:
-        def __init__(self, *writers):
-            self.writers = writers
-        def write(self, data):
-            for w in self.writers:
-                try:
-                    w.write(data)
-                except Exception:
-                    pass
-            try:
-                for w in self.writers:
-                    if hasattr(w, 'flush'):
-                        w.flush()
-            except Exception:
-                pass
-        def flush(self):
-            for w in self.writers:
-                try:
-                    if hasattr(w, 'flush'):
-                        w.flush()
-                except Exception:
-                    pass
-
-    # Open (or create) the combined errors/log file and redirect stdout/stderr
-    log_file = open(error_log_path, 'a', encoding='utf-8')
-    original_stdout = sys.stdout
-    original_stderr = sys.stderr
-    sys.stdout = Tee(original_stdout, log_file)
-    sys.stderr = Tee(original_stderr, log_file)
-
-    # If user requested fetch-only, read alignment list from existing CSV instead of scraping
-    if fetch_alignments_only:
-        if not os.path.isfile(output_csv):
-            print(f"Annotations CSV not found: {output_csv}")
-            sys.exit(2)
-        alignment_data = []
-        total_records = 0
-        import csv as _csv
-        with open(output_csv, newline='', encoding='utf-8') as _infp:
-            reader = _csv.DictReader(_infp)
-            for row in reader:
-                pdb = (row.get('pdb_id') or '').strip()
-                chain = (row.get('chain') or '').strip()
-                source = (row.get('source') or '').strip()
-                region_values_str = (row.get('region_values') or '[]').strip()
-                # Parse the string representation of list back to list
-                import ast
-                try:
-                    region_values = ast.literal_eval(region_values_str)
-                except:
-                    region_values = []
-                if pdb and chain:
-                    alignment_data.append({'pdb_id': pdb, 'chain': chain, 'source': source, 'region_values': region_values})
-                    total_records += 1
-        print(f"Read {total_records} annotations from {output_csv} (fetch-only mode)")
-    else:
-        print("Starting scrape...")
-        try:
-            # Write a header to indicate a new run was appended
-            print("\n" + "="*60)
-            print(f"New run: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"Region classes: {region_classes}")
-
-            alignment_data, total_records = scrape_annotations(
-                region_classes=region_classes, 
-                page_size=page_size, 
-                max_pages=max_pages, 
-                sleep_s=5,
-                output_csv=output_csv,
-                profile_dir=profile_dir
-            )
-        finally:
-            # allow later parts to reopen the file as needed; keep log_file open until end
-            pass
-
-    print(f"Scraped {total_records} unique proteins.")
-
-    if get_alignments:
-        print(f"Downloading alignments...")
-        # append to existing error log instead of overwriting so all prints are combined
-        with open(error_log_path, 'a', encoding='utf-8') as error_log:
-            error_log.write(f"Started alignments download: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            error_log.write("="*60 + "\n\n")
-
-            total_downloads = 0
-            for data in tqdm.tqdm(alignment_data, total=len(alignment_data)):
-                pdb_id = data['pdb_id']
-                chain = data['chain']
-                source = data['source']
-                region_values = data.get('region_values', [])
-
-                # Process each region value
-                region_num = 0
-                for region_id in region_values:
-                    # Skip single-digit regions
-                    if len(region_id) == 1 and region_id.isdigit():
-                        continue
-
-                    # Try up to 30 times, incrementing region_num each time
-                    original_region_num = region_num
-                    fasta_content = None
-                    max_retries = 30
-
-                    for attempt in range(max_retries):
-                        current_region_num = original_region_num + attempt
-                        fasta_content = fetch_alignment(
-                            pdb_id, chain, source,
-                            region_num=current_region_num,
-                            region_id=region_id,
-                            output_dir=output_dir,
-                            error_log=error_log,
-                            silent=True  # Suppress individual errors during retries
-                        )
-
-                        if fasta_content:
-                            # Success! Parse unit count and update region_num for next region
-                            total_downloads += 1
-                            region_num = parse_unit_count(fasta_content)
-                            break
-
-                    # If all attempts failed, log error and move to next region with original region_num
-                    if not fasta_content:
-                        error_msg = f"Error fetching {pdb_id} {chain} region {region_id}: Failed after {max_retries} attempts (region_num {original_region_num} to {original_region_num + max_retries - 1})\n"
-                        error_log.write(error_msg)
-                        error_log.flush()
-                        # Keep region_num as it was before this failed region
-                        region_num = original_region_num
-
-        print(f"Downloaded {total_downloads} alignment files.")
-        print(f"Errors logged to: {error_log_path}")
-
-    print(f"Job complete.")
-
-    # restore stdout/stderr and close the log file
-    try:
-        sys.stdout = original_stdout
-        sys.stderr = original_stderr
-    except Exception:
-        pass
+    # Send progress messages to the console and append them to the combined log file
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.addFilter(lambda record: not record.exc_info)  # tracebacks go to the file only
+    file_handler = logging.FileHandler(error_log_path, mode='a', encoding='utf-8')
+    log_handlers = [console_handler, file_handler]
+    for handler in log_handlers:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _LOGGER.addHandler(handler)
+    _LOGGER.setLevel(logging.INFO)
+    _LOGGER.propagate = False
+
     try:
-        log_file.close()
+        # If user requested fetch-only, read alignment list from existing CSV instead of scraping
+        if fetch_alignments_only:
+            if not os.path.isfile(output_csv):
+                _LOGGER.error(f"Annotations CSV not found: {output_csv}")
+                sys.exit(2)
+            # JSON list columns parse with json.loads; older repr-style CSVs still load
+            alignment_data = load_annotations(output_csv)
+            total_records = len(alignment_data)
+            _LOGGER.info(f"Read {total_records} annotations from {output_csv} (fetch-only mode)")
+        else:
+            _LOGGER.info("Starting scrape...")
+            # Write a header to indicate a new run was appended
+            _LOGGER.info("\n" + "="*60)
+            _LOGGER.info(f"New run: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            if shards:
+                _LOGGER.info(f"Region classes (sharded): {', '.join(shards)}")
+                alignment_data, total_records = scrape_sharded(
+                    shards,
+                    output_csv=output_csv,
+                    profile_dir=profile_dir,
+                    disk_cache_dir=args.chrome_cache_dir,
+                    log_api=args.log_api_responses,
+                    page_size=page_size,
+                    max_pages=max_pages,
+                    sleep_s=5,
+                    headless=not args.headful
+                )
+            else:
+                _LOGGER.info(f"Region classes: {region_classes}")
+                alignment_data, total_records = scrape_annotations(
+                    region_classes=region_classes, 
+                    page_size=page_size, 
+                    max_pages=max_pages, 
+                    sleep_s=5,
+                    output_csv=output_csv,
+                    profile_dir=profile_dir,
+                    disk_cache_dir=args.chrome_cache_dir,
+                    headless=not args.headful,
+                    resume=args.resume,
+                    log_api=args.log_api_responses,
+                    driver=driver
+                )
+
+        _LOGGER.info(f"Scraped {total_records} unique proteins.")
+
+        if get_alignments:
+            _LOGGER.info("Downloading alignments...")
+            # append to existing error log instead of overwriting so all prints are combined
+            listener = start_error_log(error_log_path)
+            try:
+                error_logger = logging.getLogger("repeatsdb.errors")
+                error_logger.info(f"Started alignments download: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+                error_logger.info("="*60 + "\n")
+                total_downloads = download_alignments(alignment_data, output_dir,
+                                                      workers=download_workers, use_async=use_async)
+            finally:
+                stop_error_log(listener)
+
+            _LOGGER.info(f"Downloaded {total_downloads} alignment files.")
+            _LOGGER.info(f"Errors logged to: {error_log_path}")
+
+        _LOGGER.info("Job complete.")
     except Exception:
-        pass
\ No newline at end of file
+        _LOGGER.exception("Job failed")
+        raise
+    finally:
+        # detach and close the handlers so repeated in-process runs do not stack them
+        for handler in log_handlers:
+            _LOGGER.removeHandler(handler)
+            handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,10 @@ Behavior:
 - For rows with `source` containing "RCSB", fetch FASTA from RCSB: https://www.rcsb.org/fasta/entry/{pdb_id}
   and pick the chain matching the `chain` column.
 - For rows with `source` containing "AlphaFold" (or exactly "AlphaFoldDB"), fetch UniProt FASTA using the
-  accession in the `uniprot` column via UniProt REST endpoints.
-- Writes each sequence to output FASTA as it is retrieved to minimize memory usage.
+  accession in the `uniprot` column via UniProt REST endpoints. These are fetched up front in batches of
+  100 accessions per request; accessions missing from a batch fall back to a per-row search.
+- Rows are processed in batches of 1000: the RCSB entries of a batch are downloaded concurrently, then its
+  records are written to the output FASTA in input order (buffered; the file is complete once the script exits).
 - Writes errors to an accompanying .err file next to the output FASTA.
 - FASTA header: >{pdbid}_{chain} followed by description fields: region_values, region_units, pfam, source
 
@@ -23,14 +25,34 @@ import sys
 import os
 import csv
 import re
-import requests
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Optional, Tuple
+from http_session import lazy_session
 
 RCSB_FASTA_URL = "https://www.rcsb.org/fasta/entry/{pdb}"
 UNIPROT_FASTA_URL = "https://rest.uniprot.org/uniprotkb/search?query=({accession})&format=fasta"
+UNIPROT_ACCESSIONS_URL = "https://rest.uniprot.org/uniprotkb/accessions"
+UNIPROT_BATCH_SIZE = 100
+# Rows are read ROW_BATCH_SIZE at a time; the RCSB entries of each batch are
+# downloaded concurrently, then the batch is written out in input order.
+ROW_BATCH_SIZE = 1000
+RCSB_WORKERS = 32
 # and let caller log the error.)
 
+# Shared HTTP session so keep-alive connections to rcsb.org / uniprot.org are
+# reused across rows.
+get_session = lazy_session(retries=3, backoff_factor=0.3,
+                           pool_connections=20, pool_maxsize=50)
+
+
+@lru_cache(maxsize=256)
+def _chain_re(chain: str) -> "re.Pattern[str]":
+    """Compiled whole-word pattern for `chain`, built once per distinct chain id."""
+    return re.compile(r"\b" + re.escape(chain) + r"\b")
+
 
 def header_matches_chain(header: str, chain: str, pdb: str) -> bool:
     h = header.lower()
@@ -42,33 +64,70 @@ def header_matches_chain(header: str, chain: str, pdb: str) -> bool:
     if f"|{chain}|" in header:
         return True
     # patterns like >1abc_A or >1abc|A|
-    if re.search(r"\b" + re.escape(chain) + r"\b", header):
+    if _chain_re(chain).search(header):
         return True
     return False
 
 
-def fetch_sequence_rcsb(pdb: str, chain: str, timeout=2) -> Optional[str]:
-    url = RCSB_FASTA_URL.format(pdb=pdb)
-    try:
-        r = requests.get(url, timeout=timeout)
-        r.raise_for_status()
-        text = r.text
-    except Exception:
-        return None
-
-    parts = re.split(r"(?m)^>", text)
-    for part in parts:
+def _split_fasta(text: str) -> Tuple[Tuple[str, str], ...]:
+    """Split multi-FASTA text into ((header, seq), ...) with the '>' and line breaks removed."""
+    entries = []
+    for part in re.split(r"(?m)^>", text):
         if not part.strip():
             continue
         lines = part.splitlines()
         header = lines[0].strip()
         seq = ''.join(l.strip() for l in lines[1:] if l.strip())
+        entries.append((header, seq))
+    return tuple(entries)
+
+
+@lru_cache(maxsize=8192)
+def _rcsb_entries(pdb: str, timeout=10) -> Tuple[Tuple[str, str], ...]:
+    """Return the ((header, seq), ...) records of an RCSB entry FASTA.
+
+    The response is parsed line by line as it streams in rather than being
+    buffered and split. Memoized per pdb_id so rows for other chains of the
+    same entry reuse the download; failures raise and are therefore not cached.
+    """
+    entries = []
+    header, seq_parts = None, []
+    with get_session().get(RCSB_FASTA_URL.format(pdb=pdb), timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        r.encoding = r.encoding or 'utf-8'
+        for line in r.iter_lines(decode_unicode=True):
+            line = line.strip()
+            if line.startswith('>'):
+                if header is not None:
+                    entries.append((header, ''.join(seq_parts)))
+                header, seq_parts = line[1:].strip(), []
+            elif line and header is not None:
+                seq_parts.append(line)
+    if header is not None:
+        entries.append((header, ''.join(seq_parts)))
+    return tuple(entries)
+
+
+def _try_rcsb_entries(pdb: str, timeout=10) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """_rcsb_entries() that returns None instead of raising; safe to map over a pool."""
+    try:
+        return _rcsb_entries(pdb, timeout)
+    except Exception:
+        return None
+
+
+def _match_chain(entries, chain: str, pdb: str) -> Optional[str]:
+    for header, seq in entries or ():
         if header_matches_chain(header, chain, pdb):
             return seq
     # no matching chain found
     return None
 
 
+def fetch_sequence_rcsb(pdb: str, chain: str, timeout=10) -> Optional[str]:
+    return _match_chain(_try_rcsb_entries(pdb, timeout), chain, pdb)
+
+
 def fetch_sequence_uniprot(accession: str, timeout=2) -> Optional[str]:
     """Fetch sequence from UniProt using the JSON search endpoint.
 
@@ -81,7 +140,7 @@ def fetch_sequence_uniprot(accession: str, timeout=2) -> Optional[str]:
 
     url = UNIPROT_FASTA_URL.format(accession=accession)
     try:
-        r = requests.get(url, timeout=timeout)
+        r = get_session().get(url, timeout=timeout)
         r.raise_for_status()
         text = r.text
         fasta_lines = text.splitlines()
@@ -95,6 +154,35 @@ def fetch_sequence_uniprot(accession: str, timeout=2) -> Optional[str]:
     return seq
 
 
+def fetch_uniprot_batch(accessions, timeout=10) -> Dict[str, str]:
+    """Fetch sequences for many UniProt accessions, UNIPROT_BATCH_SIZE per request.
+
+    Returns {accession: sequence} keyed on the accession field of each FASTA
+    header (">sp|P12345|..."). Batches that fail are skipped; callers fall back
+    to fetch_sequence_uniprot() for any accession missing from the result.
+    """
+    seqs = {}
+    accessions = list(dict.fromkeys(a for a in accessions if a))
+    for i in range(0, len(accessions), UNIPROT_BATCH_SIZE):
+        batch = accessions[i:i + UNIPROT_BATCH_SIZE]
+        try:
+            r = get_session().get(UNIPROT_ACCESSIONS_URL,
+                                  params={"accessions": ",".join(batch), "format": "fasta"},
+                                  timeout=timeout)
+            r.raise_for_status()
+        except Exception:
+            continue
+        for header, seq in _split_fasta(r.text):
+            fields = header.split("|")
+            if len(fields) >= 2 and seq:
+                seqs[fields[1]] = seq
+    return seqs
+
+
+def is_alphafold_source(source: str) -> bool:
+    return 'alphafold' in source.lower() or source.strip() == 'AlphaFoldDB'
+
+
 def make_description(region_values: str, region_units: str, pfam: str, source: str, uniprot: str) -> str:
     parts = []
     if region_values:
@@ -110,12 +198,14 @@ def make_description(region_values: str, region_units: str, pfam: str, source: s
     return ' '.join(parts)
 
 
-def main(argv):
-    if len(argv) < 3:
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) < 2:
         print("Usage: python sequences_scrape.py input_annotations.csv output_sequences.fasta")
         sys.exit(2)
-    input_csv = argv[1]
-    output_fasta = argv[2]
+    input_csv = argv[0]
+    output_fasta = argv[1]
     error_log = output_fasta + '.err'
 
     os.makedirs(os.path.dirname(output_fasta) or '.', exist_ok=True)
@@ -124,54 +214,68 @@ def main(argv):
          open(output_fasta, 'w', encoding='utf-8') as outfa, \
          open(error_log, 'w', encoding='utf-8') as errf:
 
+        # first pass: fetch the sequences of all AlphaFold rows in UniProt batches
+        accessions = [(row.get('pdb_id') or '').strip() for row in csv.DictReader(infp)
+                      if is_alphafold_source((row.get('source') or '').strip())]
+        uniprot_seqs = fetch_uniprot_batch(accessions)
+        infp.seek(0)
+
         reader = csv.DictReader(infp)
+        rows = enumerate(reader, 1)
         written = 0
-        for i, row in enumerate(reader, 1):
-            pdb_id = (row.get('pdb_id') or '').strip()
-            chain = (row.get('chain') or '').strip()
-            source = (row.get('source') or '').strip()
-            uniprot = (row.get('uniprot') or '').strip()
-            region_values = (row.get('region_values') or '').strip()
-            region_units = (row.get('region_units') or '').strip()
-            pfam = (row.get('pfam') or '').strip()
-
-            if not pdb_id or not chain:
-                errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Missing pdb_id/chain on line {i}\n")
-                continue
-
-            seq = None
-            try:
-                alphafold_source = 'alphafold' in source.lower() or source.strip() == 'AlphaFoldDB'
-                if alphafold_source:
-                    # pdb_id is actually uniprot accession here
-                    seq = fetch_sequence_uniprot(pdb_id)
-                else:
-                    seq = fetch_sequence_rcsb(pdb_id, chain)
-                if not seq or not str(seq).strip():
-                    # More detailed error logging for missing/empty sequences
-                    if alphafold_source:
-                        acc_clean = re.sub(r'[_\-].+$', '', uniprot)
-                        detail = f"uniprot={acc_clean}" if acc_clean else "uniprot=<missing>"
-                    else:
-                        detail = f"pdb={pdb_id} chain={chain}"
-                    errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Empty/missing sequence for {pdb_id}_{chain} (source={source}) {detail}\n")
-                    continue
-                # write fasta record
-                desc = make_description(region_values, region_units, pfam, source, uniprot)
-                header = f">{pdb_id}_{chain} {desc}\n"
-                outfa.write(header)
-                #wrap sequence to 80 chars per line
-                for j in range(0, len(seq), 80):
-                    outfa.write(seq[j:j+80] + '\n')
-
-                outfa.flush()
-                written += 1
-            except Exception as e:
-                errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Exception for {pdb_id}_{chain}: {e}\n")
-                continue
+        with ThreadPoolExecutor(max_workers=RCSB_WORKERS) as executor:
+            while True:
+                batch = list(islice(rows, ROW_BATCH_SIZE))
+                if not batch:
+                    break
+                # download every RCSB entry referenced by this batch concurrently
+                pdbs = list({(row.get('pdb_id') or '').strip() for _, row in batch
+                             if not is_alphafold_source((row.get('source') or '').strip())} - {''})
+                rcsb = dict(zip(pdbs, executor.map(_try_rcsb_entries, pdbs)))
+
+                for i, row in batch:
+                    pdb_id = (row.get('pdb_id') or '').strip()
+                    chain = (row.get('chain') or '').strip()
+                    source = (row.get('source') or '').strip()
+                    uniprot = (row.get('uniprot') or '').strip()
+                    region_values = (row.get('region_values') or '').strip()
+                    region_units = (row.get('region_units') or '').strip()
+                    pfam = (row.get('pfam') or '').strip()
+
+                    if not pdb_id or not chain:
+                        errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Missing pdb_id/chain on line {i}\n")
+                        continue
+
+                    seq = None
+                    try:
+                        alphafold_source = is_alphafold_source(source)
+                        if alphafold_source:
+                            # pdb_id is actually uniprot accession here
+                            seq = uniprot_seqs.get(pdb_id) or fetch_sequence_uniprot(pdb_id)
+                        else:
+                            seq = _match_chain(rcsb.get(pdb_id), chain, pdb_id)
+                        if not seq or not str(seq).strip():
+                            # More detailed error logging for missing/empty sequences
+                            if alphafold_source:
+                                acc_clean = re.sub(r'[_\-].+$', '', uniprot)
+                                detail = f"uniprot={acc_clean}" if acc_clean else "uniprot=<missing>"
+                            else:
+                                detail = f"pdb={pdb_id} chain={chain}"
+                            errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Empty/missing sequence for {pdb_id}_{chain} (source={source}) {detail}\n")
+                            continue
+                        # write fasta record
+                        desc = make_description(region_values, region_units, pfam, source, uniprot)
+                        header = f">{pdb_id}_{chain} {desc}\n"
+                        # wrap sequence to 80 chars per line; one buffered write per record
+                        wrapped = '\n'.join(seq[j:j+80] for j in range(0, len(seq), 80))
+                        outfa.write(header + wrapped + '\n')
+                        written += 1
+                    except Exception as e:
+                        errf.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Exception for {pdb_id}_{chain}: {e}\n")
+                        continue
 
     print(f"Done. Wrote {written} sequences to {output_fasta}. Errors in {error_log}.")
 
 
 if __name__ == '__main__':
-    main(sys.argv)
+    main()